@@ -0,0 +1,163 @@
+"""
+Gerador de carga para a API do cluster (cluster_docker/server).
+
+Dispara requisições concorrentes contra uma rota de resumo e, ao final,
+informa a vazão, a contagem por status HTTP, as latências (p50, p90, p99 e
+máxima) e a fração das requisições coalescidas pelo single-flight. Por padrão
+cada requisição pede um id diferente, para medir o caminho até o modelo e não
+só o reaproveitamento de chamadas em andamento. Respostas 200 cujo resumo é uma mensagem de erro (versões antigas da
+API devolviam falhas do backend assim) contam como "200-erro", não como
+sucesso. Para medir sem um Ollama real, suba o stub_ollama.py e aponte a
+API para ele com OLLAMA_HOST.
+
+Uso:
+    python carga.py --gerar-iterations ../server/iterations.json --ids 1000
+    python carga.py --url http://localhost:8000 --rota "/summarize/{id}/ollama" --ids 1000 --concorrencia 16 --total 500
+"""
+import argparse
+import json
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import requests
+
+from stub_ollama import PASTA_GRAVACOES
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear sobre os valores ordenados."""
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def gerar_iterations(caminho, quantidade):
+    """
+    Cria um iterations.json com `quantidade` reclamações de ids 0 a quantidade - 1,
+    repetindo os textos das respostas gravadas, para a API ter o que resumir.
+    """
+    with open(os.path.join(PASTA_GRAVACOES, "10_reclamacoes_resumidas_lc_ollama.json"), "r", encoding="utf-8") as f:
+        gravadas = json.load(f)
+
+    data_list = [
+        {
+            "id_reclamacao": str(i),
+            "reclamacao_anonimizada": gravadas[i % len(gravadas)].get("reclamação_original"),
+            "interacoes": [],
+        }
+        for i in range(quantidade)
+    ]
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(data_list, f, ensure_ascii=False, indent=2)
+    print(f"{len(data_list)} reclamações salvas em {caminho}")
+
+
+def classificar(response):
+    """Status HTTP da resposta, ou "200-erro" quando um 200 traz um erro do backend no lugar do resumo."""
+    codigo = str(response.status_code)
+    if response.status_code == 200:
+        try:
+            corpo = response.json()
+        except ValueError:
+            return "200-erro"
+        resumo = corpo.get("resumo") if isinstance(corpo, dict) else None
+        if not isinstance(resumo, str) or resumo.startswith("Error"):
+            return "200-erro"
+    return codigo
+
+
+def ler_singleflight(url_base):
+    """Contadores do single-flight expostos em /stats, ou None se a API não os expõe."""
+    try:
+        response = requests.get(url_base + "/stats", timeout=5)
+        response.raise_for_status()
+        return response.json()["singleflight"]
+    except (requests.exceptions.RequestException, ValueError, KeyError):
+        return None
+
+
+def executar_carga(url, concorrencia, total, timeout, ids=None):
+    """
+    Retorna a lista de (latência, status) de cada requisição e a duração total.
+    Um "{id}" na url é trocado pelo número da requisição módulo `ids`.
+    """
+    resultados = []
+    lock = threading.Lock()
+    sessao_por_thread = threading.local()
+
+    def requisicao(n):
+        # Uma sessão por thread para reaproveitar as conexões sem compartilhar estado
+        if not hasattr(sessao_por_thread, "sessao"):
+            sessao_por_thread.sessao = requests.Session()
+
+        inicio = perf_counter()
+        try:
+            response = sessao_por_thread.sessao.get(
+                url.replace("{id}", str(n % ids if ids else n)), headers={"X-Request-Timeout": str(timeout)}, timeout=timeout
+            )
+            codigo = classificar(response)
+        except requests.exceptions.RequestException as e:
+            codigo = type(e).__name__
+        duracao = perf_counter() - inicio
+
+        with lock:
+            resultados.append((duracao, codigo))
+
+    inicio = perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(requisicao, range(total)))
+    duracao_total = perf_counter() - inicio
+
+    return resultados, duracao_total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de carga para a API de resumos.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rota", default="/summarize/{id}/ollama",
+                        help='Rota testada; "{id}" vira o id da reclamação de cada requisição.')
+    parser.add_argument("--ids", type=int, default=1000,
+                        help="Quantidade de ids distintos usados em {id} (e gerados por --gerar-iterations).")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--total", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="Prazo de cada requisição (s), também enviado em X-Request-Timeout.")
+    parser.add_argument("--gerar-iterations", metavar="CAMINHO",
+                        help="Apenas gera um iterations.json a partir das respostas gravadas e sai.")
+    args = parser.parse_args()
+
+    if args.gerar_iterations:
+        gerar_iterations(args.gerar_iterations, args.ids)
+        raise SystemExit()
+
+    url_base = args.url.rstrip("/")
+    url = url_base + args.rota
+    print(f"{args.total} requisições para {url} com concorrência {args.concorrencia}...")
+    antes = ler_singleflight(url_base)
+    resultados, duracao_total = executar_carga(url, args.concorrencia, args.total, args.timeout, args.ids)
+    depois = ler_singleflight(url_base)
+
+    status = Counter(codigo for _, codigo in resultados)
+    sucesso = [duracao for duracao, codigo in resultados if codigo == "200"]
+    print(f"Vazão: {len(resultados) / duracao_total:.2f} req/s ({len(sucesso) / duracao_total:.2f} com sucesso) em {duracao_total:.1f} s")
+    print("Status:", ", ".join(f"{codigo}={n}" for codigo, n in sorted(status.items())))
+    if antes is not None and depois is not None:
+        # Coalescidas não chegam ao modelo: uma fração alta mede o single-flight, não o backend
+        execucoes = depois["execucoes"] - antes["execucoes"]
+        coalescidas = depois["chamadas_economizadas"] - antes["chamadas_economizadas"]
+        fracao = coalescidas / (execucoes + coalescidas) if execucoes + coalescidas else 0
+        print(f"Single-flight: {execucoes} chamadas ao modelo, {coalescidas} coalescidas ({fracao:.0%})")
+    for nome, latencias in (("todas", [duracao for duracao, _ in resultados]), ("200", sucesso)):
+        if latencias:
+            print(
+                f"Latência {nome} (s): "
+                f"p50={percentil(latencias, 50):.3f} p90={percentil(latencias, 90):.3f} "
+                f"p99={percentil(latencias, 99):.3f} máx={max(latencias):.3f}"
+            )
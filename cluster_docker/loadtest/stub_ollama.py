@@ -0,0 +1,296 @@
+"""
+Servidor falso do Ollama para testes de carga e desempenho sem GPU nem modelo.
+
+Implementa /api/generate, /api/chat e /api/tags (com streaming e `format`
+"json" ou schema) e responde com resumos gravados nos arquivos
+10_reclamacoes_resumidas_*.json do summarizer. A latência segue um perfil
+configurável: carga do modelo (quando ele não está em memória), prefill e
+geração com taxas de tokens por segundo, mais um jitter aleatório.
+
+Uso:
+    python stub_ollama.py --porta 11435 --perfil gpu
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, perf_counter, sleep
+
+PASTA_GRAVACOES = os.path.join(os.path.dirname(__file__), "..", "..", "summarizer")
+
+# Perfis de latência: tempo de carga do modelo (s), tokens/s no prefill e na geração, jitter relativo
+PERFIS = {
+    "instantaneo": {"carga": 0.0, "prefill_tps": 0, "tps": 0, "jitter": 0.0},
+    "gpu": {"carga": 3.0, "prefill_tps": 2000, "tps": 60, "jitter": 0.1},
+    "cpu": {"carga": 10.0, "prefill_tps": 150, "tps": 8, "jitter": 0.2},
+}
+
+
+def carregar_gravacoes(padrao):
+    """Lê os arquivos gravados e retorna uma lista de (texto da reclamação, resposta)."""
+    gravacoes = []
+    for caminho in sorted(glob.glob(padrao)):
+        with open(caminho, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                texto = item.get("reclamação_original") or item.get("reclamação") or ""
+                resposta = item.get("resumo_ollama_langchain") or item.get("resposta")
+                if resposta:
+                    gravacoes.append((texto, resposta))
+    return gravacoes
+
+
+def contar_tokens(texto):
+    # Aproximação suficiente para simular tempos: ~1 token por palavra
+    return len(texto.split())
+
+
+class StubOllama:
+    """Estado do servidor falso: respostas gravadas, perfil de latência e modelos em memória."""
+
+    def __init__(self, gravacoes, perfil, modelos, seed=42):
+        self.gravacoes = gravacoes
+        self.perfil = perfil
+        self.modelos = modelos
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # modelo -> instante (monotonic) em que sai da memória
+        self._carregados = {}
+
+    def jitter(self, segundos):
+        with self._lock:
+            fator = 1 + self.rng.uniform(-self.perfil["jitter"], self.perfil["jitter"])
+        return max(0.0, segundos * fator)
+
+    def carregar_modelo(self, modelo, keep_alive):
+        """Simula a carga do modelo se ele não estiver em memória; retorna a duração em segundos."""
+        with self._lock:
+            carregado = self._carregados.get(modelo, 0) > monotonic()
+        duracao = 0.0 if carregado else self.jitter(self.perfil["carga"])
+        sleep(duracao)
+        with self._lock:
+            self._carregados[modelo] = monotonic() + _segundos_keep_alive(keep_alive)
+        return duracao
+
+    def descarregar_modelo(self, modelo):
+        with self._lock:
+            self._carregados.pop(modelo, None)
+
+    def escolher_resposta(self, prompt):
+        """Resposta gravada da reclamação contida no prompt ou, se não houver, uma escolhida pelo hash do prompt."""
+        for texto, resposta in self.gravacoes:
+            if texto and texto[:200] in prompt:
+                return resposta
+        indice = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16) % len(self.gravacoes)
+        return self.gravacoes[indice][1]
+
+    def montar_conteudo(self, resposta, formato):
+        """Converte a resposta gravada para o formato pedido (texto livre, "json" ou schema JSON)."""
+        if isinstance(resposta, str):
+            try:
+                resposta = json.loads(resposta)
+            except json.JSONDecodeError:
+                resposta = {"Resumo": resposta}
+
+        if isinstance(formato, dict):
+            chaves = list(formato.get("properties", {}))
+            valores = list(resposta.values())
+            resposta = {
+                chave: resposta.get(chave, valores[i % len(valores)] if valores else "")
+                for i, chave in enumerate(chaves)
+            }
+        if formato:
+            return json.dumps(resposta, ensure_ascii=False)
+        return "Reclamação: " + " ".join(str(v) for v in resposta.values())
+
+
+def _segundos_keep_alive(keep_alive):
+    """
+    Interpreta keep_alive do Ollama ("5m", "30s", "1h", "-1m", número de
+    segundos); padrão 5 minutos. Qualquer valor negativo mantém o modelo
+    carregado para sempre e 0 o descarrega logo após a requisição.
+    """
+    if keep_alive is None:
+        return 300
+    if isinstance(keep_alive, str):
+        unidades = {"s": 1, "m": 60, "h": 3600}
+        if keep_alive and keep_alive[-1] in unidades:
+            segundos = float(keep_alive[:-1]) * unidades[keep_alive[-1]]
+        else:
+            segundos = float(keep_alive)
+    else:
+        segundos = keep_alive
+    return float("inf") if segundos < 0 else segundos
+
+
+class Handler(BaseHTTPRequestHandler):
+    stub = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _enviar_json(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            return self._enviar_json(404, {"error": "not found"})
+        self._enviar_json(200, {
+            "models": [
+                {"name": m, "model": m, "modified_at": _agora(), "size": 0, "details": {}}
+                for m in self.stub.modelos
+            ]
+        })
+
+    def do_POST(self):
+        if self.path not in ("/api/generate", "/api/chat"):
+            return self._enviar_json(404, {"error": "not found"})
+
+        tamanho = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(tamanho) or b"{}")
+        except json.JSONDecodeError:
+            return self._enviar_json(400, {"error": "invalid JSON"})
+
+        modelo = payload.get("model")
+        if modelo not in self.stub.modelos:
+            return self._enviar_json(404, {"error": f"model '{modelo}' not found, try pulling it first"})
+
+        chat = self.path == "/api/chat"
+        if chat:
+            mensagens = payload.get("messages", [])
+            prompt = "\n".join(m.get("content", "") for m in mensagens)
+        else:
+            prompt = (payload.get("system") or "") + "\n" + (payload.get("prompt") or "")
+
+        # Requisição sem prompt/mensagens apenas carrega o modelo (usado no
+        # aquecimento) ou, com keep_alive 0, o descarrega sem carregar
+        so_carga = not (payload.get("messages") if chat else payload.get("prompt"))
+        descarregar = so_carga and _segundos_keep_alive(payload.get("keep_alive")) == 0
+
+        inicio = perf_counter()
+        if descarregar:
+            self.stub.descarregar_modelo(modelo)
+        else:
+            duracao_carga = self.stub.carregar_modelo(modelo, payload.get("keep_alive"))
+
+        if so_carga:
+            corpo = {
+                "model": modelo, "created_at": _agora(), "done": True,
+                "done_reason": "unload" if descarregar else "load",
+            }
+            if chat:
+                corpo["message"] = {"role": "assistant", "content": ""}
+            else:
+                corpo["response"] = ""
+            return self._enviar_json(200, corpo)
+
+        resposta = self.stub.escolher_resposta(prompt)
+        conteudo = self.stub.montar_conteudo(resposta, payload.get("format"))
+        pedacos = conteudo.split(" ")
+        num_predict = (payload.get("options") or {}).get("num_predict")
+        if num_predict and num_predict > 0:
+            pedacos = pedacos[:num_predict]
+            conteudo = " ".join(pedacos)
+
+        perfil = self.stub.perfil
+        tokens_prompt = contar_tokens(prompt)
+        duracao_prefill = self.stub.jitter(tokens_prompt / perfil["prefill_tps"]) if perfil["prefill_tps"] else 0.0
+        intervalo_token = self.stub.jitter(1 / perfil["tps"]) if perfil["tps"] else 0.0
+        sleep(duracao_prefill)
+
+        def pedaco(texto, done):
+            corpo = {"model": modelo, "created_at": _agora(), "done": done}
+            if chat:
+                corpo["message"] = {"role": "assistant", "content": texto}
+            else:
+                corpo["response"] = texto
+            return corpo
+
+        def estatisticas(corpo, duracao_geracao):
+            corpo.update({
+                "done_reason": "stop",
+                "total_duration": int((perf_counter() - inicio) * 1e9),
+                "load_duration": int(duracao_carga * 1e9),
+                "prompt_eval_count": tokens_prompt,
+                "prompt_eval_duration": int(duracao_prefill * 1e9),
+                "eval_count": len(pedacos),
+                "eval_duration": int(duracao_geracao * 1e9),
+            })
+            return corpo
+
+        if payload.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            inicio_geracao = perf_counter()
+            for i, p in enumerate(pedacos):
+                sleep(intervalo_token)
+                self._enviar_chunk(pedaco(p if i == 0 else " " + p, False))
+            self._enviar_chunk(estatisticas(pedaco("", True), perf_counter() - inicio_geracao))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            duracao_geracao = intervalo_token * len(pedacos)
+            sleep(duracao_geracao)
+            self._enviar_json(200, estatisticas(pedaco(conteudo, True), duracao_geracao))
+
+    def _enviar_chunk(self, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(dados):x}\r\n".encode() + dados + b"\r\n")
+        self.wfile.flush()
+
+
+def _agora():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def criar_servidor(porta=11435, perfil="gpu", modelos=("llama3:instruct",), gravacoes=None, host="0.0.0.0"):
+    """Cria o servidor (sem iniciá-lo); útil para subir o stub dentro de outro script."""
+    if gravacoes is None:
+        gravacoes = carregar_gravacoes(os.path.join(PASTA_GRAVACOES, "10_reclamacoes_resumidas_*.json"))
+    perfil = PERFIS[perfil] if isinstance(perfil, str) else perfil
+    handler = type("HandlerStub", (Handler,), {"stub": StubOllama(gravacoes, perfil, list(modelos))})
+    return ThreadingHTTPServer((host, porta), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor falso do Ollama com respostas gravadas.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=11435)
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="gpu")
+    parser.add_argument("--modelos", default="llama3:instruct",
+                        help="Modelos anunciados em /api/tags, separados por vírgula.")
+    parser.add_argument("--gravacoes", default=os.path.join(PASTA_GRAVACOES, "10_reclamacoes_resumidas_*.json"),
+                        help="Padrão glob dos arquivos com respostas gravadas.")
+    parser.add_argument("--carga", type=float, help="Sobrescreve o tempo de carga do modelo (s).")
+    parser.add_argument("--prefill-tps", type=float, help="Sobrescreve os tokens/s do prefill.")
+    parser.add_argument("--tps", type=float, help="Sobrescreve os tokens/s da geração.")
+    parser.add_argument("--jitter", type=float, help="Sobrescreve a variação relativa das latências.")
+    args = parser.parse_args()
+
+    perfil = dict(PERFIS[args.perfil])
+    for chave in ("carga", "prefill_tps", "tps", "jitter"):
+        if getattr(args, chave) is not None:
+            perfil[chave] = getattr(args, chave)
+
+    gravacoes = carregar_gravacoes(args.gravacoes)
+    if not gravacoes:
+        raise SystemExit(f"Nenhuma resposta gravada encontrada em {args.gravacoes}")
+
+    servidor = criar_servidor(args.porta, perfil, args.modelos.split(","), gravacoes, args.host)
+    print(f"Stub do Ollama em http://{args.host}:{args.porta} ({len(gravacoes)} respostas gravadas, perfil {perfil})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,124 @@
+import math
+import threading
+from time import monotonic
+
+import metrics
+
+
+class Rejeitada(Exception):
+    """
+    Requisição que não pôde ser atendida: recusada antes de chegar ao modelo
+    (fila cheia, limite de taxa, prazo expirado) ou com falha do backend
+    (timeout, backend fora do ar).
+    """
+
+    def __init__(self, status_code, motivo, retry_after=None):
+        super().__init__(motivo)
+        self.status_code = status_code
+        self.motivo = motivo
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Limitador de taxa: `taxa` tokens por segundo, acumulando no máximo `capacidade`."""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = capacidade
+        self._ultimo = monotonic()
+        self._lock = threading.Lock()
+
+    def tentar_consumir(self):
+        """Consome um token; retorna 0 se conseguiu ou os segundos até o próximo token."""
+        with self._lock:
+            agora = monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.taxa
+
+
+class Admissao:
+    """
+    Controle de admissão de um backend: no máximo `max_concorrencia` chamadas
+    ao modelo ao mesmo tempo e `max_fila` esperando por uma vaga. Além disso a
+    requisição é recusada na hora (503), e quem espera além do prazo do
+    cliente é descartado (504) sem chegar ao modelo. Com um `limitador`, o
+    token só é consumido quando a vaga é concedida, logo antes da chamada: quem
+    é recusado na fila não gasta a cota.
+    """
+
+    def __init__(self, backend, max_concorrencia, max_fila, limitador=None):
+        self.backend = backend
+        self.max_concorrencia = max_concorrencia
+        self.max_fila = max_fila
+        self.limitador = limitador
+        self._cond = threading.Condition()
+        self._ativos = 0
+        self._na_fila = 0
+        # Média móvel do tempo de atendimento, usada para estimar o Retry-After
+        self._tempo_medio = 1.0
+
+    def _rejeitar(self, status_code, motivo, retry_after):
+        # A contagem em ADMISSION_REJECTIONS fica com a API, uma vez por requisição
+        raise Rejeitada(status_code, motivo, max(1, math.ceil(retry_after)))
+
+    def _estimar_espera(self):
+        return (self._na_fila + 1) * self._tempo_medio / self.max_concorrencia
+
+    def retry_after(self):
+        """Segundos sugeridos para tentar de novo, pela fila atual e o tempo médio de atendimento."""
+        with self._cond:
+            return max(1, math.ceil(self._estimar_espera()))
+
+    def executar(self, prazo_atual, funcao, *args, **kwargs):
+        """
+        Executa funcao(*args, **kwargs) quando houver vaga.
+        `prazo_atual()` retorna o instante de time.monotonic() após o qual
+        ninguém mais espera o resultado; é relido a cada volta, pois o prazo de
+        uma chamada compartilhada cresce quando chegam novos interessados.
+        """
+        inicio_fila = monotonic()
+        with self._cond:
+            if self._ativos >= self.max_concorrencia and self._na_fila >= self.max_fila:
+                self._rejeitar(503, "fila_cheia", self._estimar_espera())
+
+            self._na_fila += 1
+            metrics.QUEUE_DEPTH.labels(backend=self.backend).set(self._na_fila)
+            try:
+                while self._ativos >= self.max_concorrencia:
+                    restante = prazo_atual() - monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+            finally:
+                self._na_fila -= 1
+                metrics.QUEUE_DEPTH.labels(backend=self.backend).set(self._na_fila)
+
+            metrics.STAGE_LATENCY.labels(stage="queue_wait", backend=self.backend).observe(
+                monotonic() - inicio_fila
+            )
+            restante = prazo_atual() - monotonic()
+            if restante <= 0:
+                # Repassa a vaga (se houver) para o próximo da fila antes de desistir
+                self._cond.notify()
+                self._rejeitar(504, "prazo_expirado", self._estimar_espera())
+            # A cota só é gasta por quem já tem vaga e vai mesmo chamar o modelo
+            if self.limitador is not None:
+                espera = self.limitador.tentar_consumir()
+                if espera:
+                    self._cond.notify()
+                    self._rejeitar(429, "limite_de_taxa", espera)
+            self._ativos += 1
+
+        inicio = monotonic()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            with self._cond:
+                self._ativos -= 1
+                self._tempo_medio = 0.8 * self._tempo_medio + 0.2 * (monotonic() - inicio)
+                self._cond.notify()
@@ -1,33 +1,189 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from summarizer import Summarizer
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.routing import Match
+from google.api_core import exceptions as google_exceptions
+import requests
+from summarizer import Summarizer, Reclamacao, OLLAMA_MODEL, GEMINI_MODEL
+from singleflight import SingleFlight
+from admission import Admissao, Rejeitada, TokenBucket
+from modelos import Aquecimento, CatalogoModelos
+import metrics
+from time import monotonic, perf_counter
+import hashlib
 import json
 import random
-import google.generativeai as genai
-from dotenv import load_dotenv
+import threading
 import os
 
 app = FastAPI()
 
+# Requisições concorrentes para a mesma reclamação/backend/modelo
+# compartilham uma única chamada ao LLM
+coalescedor = SingleFlight(ao_consultar=lambda hit: metrics.consulta_cache("singleflight", hit))
+metrics.registrar_singleflight(coalescedor)
+
+# Controle de admissão por backend: concorrência e fila limitadas, e limite de
+# requisições por minuto no Gemini (cota da API)
+admissao = {
+    "ollama": Admissao(
+        "ollama",
+        max_concorrencia=int(os.getenv("OLLAMA_MAX_CONCORRENCIA", "2")),
+        max_fila=int(os.getenv("OLLAMA_MAX_FILA", "16")),
+    ),
+    "gemini": Admissao(
+        "gemini",
+        max_concorrencia=int(os.getenv("GEMINI_MAX_CONCORRENCIA", "4")),
+        max_fila=int(os.getenv("GEMINI_MAX_FILA", "16")),
+        limitador=TokenBucket(
+            taxa=float(os.getenv("GEMINI_RPM", "15")) / 60,
+            capacidade=int(os.getenv("GEMINI_BURST", "5")),
+        ),
+    ),
+}
+
+# Lista de modelos em cache e pré-carga dos modelos do Ollama na subida do servidor
+catalogo = CatalogoModelos(ttl=int(os.getenv("MODELOS_TTL", "300")))
+aquecimento = Aquecimento(
+    modelos=[m for m in os.getenv("OLLAMA_MODELOS_AQUECER", OLLAMA_MODEL).split(",") if m]
+)
+
+# Prazo padrão (segundos) quando o cliente não envia o cabeçalho X-Request-Timeout
+PRAZO_PADRAO = float(os.getenv("PRAZO_PADRAO", "300"))
+
 class SummarizeResponse(BaseModel):
     resumo: str
     reclamacao_anonimizada: str
 
+def carregar_reclamacoes():
+    with metrics.span("file_load"):
+        with open("iterations.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+def rotulos_da_rota(request):
+    """Retorna (rota, backend) usando o template da rota, para não explodir a cardinalidade com ids."""
+    for rota in request.app.routes:
+        match, escopo = rota.matches(request.scope)
+        if match == Match.FULL:
+            caminho = rota.path
+            backend = escopo.get("path_params", {}).get("backend") or caminho.rsplit("/", 1)[-1]
+            return caminho, backend if backend in ("gemini", "ollama") else "none"
+    return "desconhecida", "none"
+
+def prazo_da_requisicao(request):
+    """Instante (time.monotonic) em que o cliente deixa de esperar, a partir do X-Request-Timeout."""
+    try:
+        timeout = float(request.headers.get("x-request-timeout", PRAZO_PADRAO))
+    except ValueError:
+        timeout = PRAZO_PADRAO
+    return monotonic() + min(timeout, PRAZO_PADRAO)
+
+@app.exception_handler(Rejeitada)
+def tratar_rejeicao(request: Request, exc: Rejeitada):
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.motivo}, headers=headers)
+
+@app.middleware("http")
+async def medir_requisicoes(request: Request, call_next):
+    # O prazo conta a partir da chegada, antes de esperar por uma thread livre
+    request.state.prazo = prazo_da_requisicao(request)
+    rota, backend = rotulos_da_rota(request)
+    em_andamento = metrics.REQUESTS_IN_FLIGHT.labels(route=rota, backend=backend)
+    em_andamento.inc()
+    inicio = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        em_andamento.dec()
+        metrics.REQUEST_LATENCY.labels(route=rota, backend=backend).observe(perf_counter() - inicio)
+        metrics.REQUESTS_TOTAL.labels(route=rota, backend=backend, status=str(status)).inc()
+
+def resumir(instance, backend, prazo):
+    """
+    Resume a reclamação pelo backend escolhido, coalescendo chamadas idênticas
+    em andamento. Só a chamada que de fato vai ao modelo passa pelo controle de
+    admissão; quem reaproveita o resultado não ocupa vaga, espera no máximo
+    até o próprio prazo e estende o prazo da chamada compartilhada.
+    """
+    if backend == "gemini":
+        modelo, metodo = GEMINI_MODEL, Summarizer.sum_by_llm_gemini
+    else:
+        modelo, metodo = OLLAMA_MODEL, Summarizer.sum_by_llm_ollama
+
+    registro = Reclamacao.from_dict(instance)
+    # Sem id, reclamações diferentes colidiriam na mesma chave: usa o hash do prompt
+    identificador = registro.id
+    if identificador is None:
+        identificador = hashlib.sha256(registro.prompt_texto.encode("utf-8")).hexdigest()
+
+    chave = (identificador, backend, modelo)
+    try:
+        return coalescedor.executar(
+            chave,
+            # A chamada ao modelo usa o timeout padrão: quem já chegou com prazo
+            # menor desiste sozinho, sem derrubar quem ainda espera o resultado
+            lambda prazo_atual: admissao[backend].executar(
+                prazo_atual, metodo, Summarizer(registro)
+            ),
+            prazo
+        )
+    except TimeoutError:
+        # O prazo desta requisição venceu enquanto ela esperava o resultado
+        rejeicao = Rejeitada(504, "prazo_expirado", admissao[backend].retry_after())
+    except Rejeitada as e:
+        # Recusada pelo controle de admissão (vale para todos que esperavam a chamada)
+        rejeicao = e
+    except (requests.exceptions.Timeout, google_exceptions.DeadlineExceeded):
+        raise Rejeitada(504, f"timeout_{backend}")
+    except (requests.exceptions.ConnectionError, google_exceptions.ServiceUnavailable):
+        raise Rejeitada(503, f"{backend}_indisponivel", retry_after=5)
+    except (requests.exceptions.RequestException, google_exceptions.GoogleAPIError):
+        raise Rejeitada(502, f"erro_{backend}")
+
+    # Cada requisição recusada é contada uma única vez, aqui
+    metrics.ADMISSION_REJECTIONS.labels(backend=backend, reason=rejeicao.motivo).inc()
+    raise rejeicao
+
+@app.on_event("startup")
+def iniciar():
+    # Threads separadas: uma listagem lenta do Gemini não atrasa o aquecimento do Ollama
+    threading.Thread(target=catalogo.atualizar, name="catalogo", daemon=True).start()
+    threading.Thread(target=aquecimento.executar, name="aquecimento", daemon=True).start()
+
 @app.get("/")
 def hello():
-    # Lista os modelos disponíveis
-    models = genai.list_models()
-    return {"message": "Hello World", "modelos_disponiveis": [m["name"] for m in models]}
+    # Lista os modelos disponíveis (em cache, atualizada a cada MODELOS_TTL segundos)
+    return {"message": "Hello World", "modelos_disponiveis": catalogo.listar()}
+
+@app.get("/health")
+def health():
+    # Só fica pronto depois que os modelos do Ollama foram carregados
+    estado = {
+        "status": "ok" if aquecimento.pronto.is_set() else "aquecendo",
+        "modelos_aquecidos": aquecimento.aquecidos(),
+        "erros_listagem": catalogo.erros(),
+    }
+    return JSONResponse(status_code=200 if aquecimento.pronto.is_set() else 503, content=estado)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/stats")
+def stats():
+    return {"singleflight": coalescedor.metricas()}
 
 @app.get("/summarize/random/gemini", response_model=SummarizeResponse)
-def summarize_random_gemini():
-    with open("iterations.json", "r", encoding="utf-8") as f:
-        data_list = json.load(f)
+def summarize_random_gemini(request: Request):
+    data_list = carregar_reclamacoes()
 
     instance = random.choice(data_list)
-    
-    summarizer = Summarizer(instance)
-    resumo = summarizer.sum_by_llm_gemini()
+
+    resumo = resumir(instance, "gemini", request.state.prazo)
 
     return SummarizeResponse(
         resumo=resumo,
@@ -35,14 +191,31 @@ def summarize_random_gemini():
     )
 
 @app.get("/summarize/random/ollama", response_model=SummarizeResponse)
-def summarize_random_ollama():
-    with open("iterations.json", "r", encoding="utf-8") as f:
-        data_list = json.load(f)
+def summarize_random_ollama(request: Request):
+    data_list = carregar_reclamacoes()
 
     instance = random.choice(data_list)
-    
-    summarizer = Summarizer(instance)
-    resumo = summarizer.sum_by_llm_ollama()
+
+    resumo = resumir(instance, "ollama", request.state.prazo)
+
+    return SummarizeResponse(
+        resumo=resumo,
+        reclamacao_anonimizada=instance.get("reclamacao_anonimizada")
+    )
+
+@app.get("/summarize/{id_reclamacao}/{backend}", response_model=SummarizeResponse)
+def summarize_by_id(id_reclamacao: str, backend: str, request: Request):
+    if backend not in ("gemini", "ollama"):
+        raise HTTPException(status_code=404, detail=f"Backend desconhecido: {backend}")
+
+    instance = next(
+        (i for i in carregar_reclamacoes() if str(i.get("id_reclamacao")) == id_reclamacao),
+        None
+    )
+    if instance is None:
+        raise HTTPException(status_code=404, detail=f"Reclamação {id_reclamacao} não encontrada")
+
+    resumo = resumir(instance, backend, request.state.prazo)
 
     return SummarizeResponse(
         resumo=resumo,
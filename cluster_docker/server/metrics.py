@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+# Buckets pensados para chamadas de LLM: de milissegundos (cache/arquivo) até minutos (geração)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# --- HTTP ---
+REQUEST_LATENCY = Histogram(
+    "summarizer_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota e backend.",
+    ["route", "backend"],
+    buckets=BUCKETS_LATENCIA,
+)
+REQUESTS_TOTAL = Counter(
+    "summarizer_http_requests_total",
+    "Requisições HTTP concluídas por rota, backend e status.",
+    ["route", "backend", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "summarizer_http_requests_in_flight",
+    "Requisições HTTP em andamento por rota e backend.",
+    ["route", "backend"],
+)
+
+# --- Etapas internas (carga de arquivo, fila, montagem do prompt, chamada ao LLM, prefill, geração) ---
+STAGE_LATENCY = Histogram(
+    "summarizer_stage_duration_seconds",
+    "Duração de cada etapa do caminho quente do Summarizer.",
+    ["stage", "backend"],
+    buckets=BUCKETS_LATENCIA,
+)
+
+# --- LLM ---
+LLM_TOKENS = Counter(
+    "summarizer_llm_tokens_total",
+    "Tokens processados pelo LLM (prompt = prefill, completion = gerados).",
+    ["backend", "model", "kind"],
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "summarizer_llm_generation_tokens_per_second",
+    "Velocidade de geração reportada pelo Ollama (eval_count / eval_duration).",
+    ["backend", "model"],
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 500),
+)
+ERRORS = Counter(
+    "summarizer_errors_total",
+    "Erros ao chamar os backends de LLM, por tipo.",
+    ["backend", "kind"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "summarizer_admission_rejections_total",
+    "Requisições recusadas pelo controle de admissão antes de chegar ao modelo.",
+    ["backend", "reason"],
+)
+QUEUE_DEPTH = Gauge(
+    "summarizer_admission_queue_depth",
+    "Requisições aguardando vaga para chamar o modelo.",
+    ["backend"],
+)
+CACHE_LOOKUPS = Counter(
+    "summarizer_cache_lookups_total",
+    "Consultas a caches internos, separadas em hit/miss.",
+    ["cache", "result"],
+)
+
+
+def consulta_cache(cache, hit):
+    """Registra uma consulta ao cache `cache` em summarizer_cache_lookups_total."""
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+@contextmanager
+def span(stage, backend="none"):
+    """Mede a duração do bloco e registra em summarizer_stage_duration_seconds."""
+    inicio = perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage, backend=backend).observe(perf_counter() - inicio)
+
+
+def registrar_resposta_ollama(model, data):
+    """Exporta contagens de tokens e tempos reportados pelo Ollama (durações em nanossegundos)."""
+    prompt_tokens = data.get("prompt_eval_count") or 0
+    gerados = data.get("eval_count") or 0
+    LLM_TOKENS.labels(backend="ollama", model=model, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(backend="ollama", model=model, kind="completion").inc(gerados)
+
+    for stage, chave in (("model_load", "load_duration"),
+                         ("prefill", "prompt_eval_duration"),
+                         ("generation", "eval_duration")):
+        if data.get(chave):
+            STAGE_LATENCY.labels(stage=stage, backend="ollama").observe(data[chave] / 1e9)
+
+    if gerados and data.get("eval_duration"):
+        LLM_TOKENS_PER_SECOND.labels(backend="ollama", model=model).observe(
+            gerados / (data["eval_duration"] / 1e9)
+        )
+
+
+def registrar_resposta_gemini(model, response):
+    """Exporta as contagens de tokens do usage_metadata do Gemini, quando presente."""
+    uso = getattr(response, "usage_metadata", None)
+    if uso is None:
+        return
+    LLM_TOKENS.labels(backend="gemini", model=model, kind="prompt").inc(
+        getattr(uso, "prompt_token_count", 0) or 0
+    )
+    LLM_TOKENS.labels(backend="gemini", model=model, kind="completion").inc(
+        getattr(uso, "candidates_token_count", 0) or 0
+    )
+
+
+class ColetorSingleFlight:
+    """Expõe os contadores de um SingleFlight no formato Prometheus."""
+
+    def __init__(self, singleflight):
+        self.singleflight = singleflight
+
+    def collect(self):
+        m = self.singleflight.metricas()
+
+        chamadas = CounterMetricFamily(
+            "summarizer_singleflight_calls",
+            "Requisições que passaram pelo single-flight (executed = chamou o LLM, coalesced = reaproveitou).",
+            labels=["result"],
+        )
+        chamadas.add_metric(["executed"], m["execucoes"])
+        chamadas.add_metric(["coalesced"], m["chamadas_economizadas"])
+        yield chamadas
+
+        yield GaugeMetricFamily(
+            "summarizer_singleflight_in_flight",
+            "Chamadas ao LLM em andamento no single-flight.",
+            value=m["em_andamento"],
+        )
+
+
+def registrar_singleflight(singleflight):
+    REGISTRY.register(ColetorSingleFlight(singleflight))
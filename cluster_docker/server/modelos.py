@@ -0,0 +1,134 @@
+import os
+import threading
+from time import monotonic, sleep
+
+import google.generativeai as genai
+import requests
+from dotenv import load_dotenv
+
+import metrics
+from summarizer import OLLAMA_HOST, OLLAMA_MODEL, OLLAMA_KEEP_ALIVE
+
+
+class CatalogoModelos:
+    """
+    Cache com TTL da lista de modelos disponíveis no Gemini e no Ollama.
+
+    A listagem vai à rede no máximo uma vez a cada `ttl` segundos; se a
+    atualização falhar, a última lista conhecida continua sendo servida.
+    Depois que o TTL expira, `listar` dispara uma única atualização em
+    segundo plano e responde na hora com a lista anterior.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._atualizando = threading.Lock()
+        self._modelos = {"gemini": [], "ollama": []}
+        self._erros = {}
+        self._expira_em = 0
+
+    def _listar_gemini(self):
+        load_dotenv()
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        # Timeout curto: sem rede para o Gemini a listagem ficaria presa por ~60 s
+        return [m.name for m in genai.list_models(request_options={"timeout": 10})]
+
+    def _listar_ollama(self):
+        response = requests.get(f"{OLLAMA_HOST}/api/tags", timeout=10)
+        response.raise_for_status()
+        return [m.get("name") for m in response.json().get("models", [])]
+
+    def _expirado(self):
+        with self._lock:
+            return monotonic() >= self._expira_em
+
+    def _buscar(self):
+        """Busca as listas nos dois backends, mantendo a anterior de quem falhar."""
+        modelos, erros = {}, {}
+        for backend, listar in (("gemini", self._listar_gemini), ("ollama", self._listar_ollama)):
+            try:
+                modelos[backend] = listar()
+            except Exception as e:
+                erros[backend] = str(e)
+
+        with self._lock:
+            self._modelos.update(modelos)
+            self._erros = erros
+            self._expira_em = monotonic() + self.ttl
+
+    def atualizar(self):
+        """Atualiza as listas se o TTL expirou; se outra thread já estiver atualizando, espera ela terminar."""
+        with self._atualizando:
+            if self._expirado():
+                self._buscar()
+
+    def _atualizar_em_segundo_plano(self):
+        # Chamado com self._atualizando já adquirido por listar()
+        try:
+            if self._expirado():
+                self._buscar()
+        finally:
+            self._atualizando.release()
+
+    def listar(self):
+        """Retorna {"gemini": [...], "ollama": [...]}; com o TTL expirado, a lista anterior enquanto ela é atualizada."""
+        valido = not self._expirado()
+        metrics.consulta_cache("modelos", valido)
+        # Só uma thread vai à rede, em segundo plano; ninguém espera por ela
+        if not valido and self._atualizando.acquire(blocking=False):
+            threading.Thread(target=self._atualizar_em_segundo_plano, name="catalogo", daemon=True).start()
+
+        with self._lock:
+            return {backend: list(nomes) for backend, nomes in self._modelos.items()}
+
+    def erros(self):
+        with self._lock:
+            return dict(self._erros)
+
+
+class Aquecimento:
+    """
+    Pré-carrega os modelos do Ollama na inicialização do servidor.
+
+    Uma chamada a /api/generate sem prompt carrega o modelo na memória, e o
+    keep_alive o mantém carregado; assim a primeira requisição real não paga
+    o custo de carga. Enquanto isso não termina o servidor não está pronto.
+    """
+
+    def __init__(self, modelos=None, intervalo_retentativa=5):
+        self.modelos = modelos or [OLLAMA_MODEL]
+        self.intervalo_retentativa = intervalo_retentativa
+        self._lock = threading.Lock()
+        self._aquecidos = set()
+        self.pronto = threading.Event()
+
+    def aquecidos(self):
+        """Cópia ordenada dos modelos já carregados (a thread de aquecimento ainda pode alterá-los)."""
+        with self._lock:
+            return sorted(self._aquecidos)
+
+    def _carregar(self, modelo):
+        with metrics.span("warmup", "ollama"):
+            response = requests.post(
+                f"{OLLAMA_HOST}/api/generate",
+                json={"model": modelo, "keep_alive": OLLAMA_KEEP_ALIVE},
+                timeout=600,
+            )
+            response.raise_for_status()
+
+    def executar(self):
+        """Tenta carregar cada modelo até conseguir; ao final marca o servidor como pronto."""
+        pendentes = [m for m in self.modelos if m not in self.aquecidos()]
+        while pendentes:
+            for modelo in pendentes:
+                try:
+                    self._carregar(modelo)
+                    with self._lock:
+                        self._aquecidos.add(modelo)
+                except Exception as e:
+                    metrics.ERRORS.labels(backend="ollama", kind=f"warmup_{type(e).__name__}").inc()
+            pendentes = [m for m in self.modelos if m not in self.aquecidos()]
+            if pendentes:
+                sleep(self.intervalo_retentativa)
+        self.pronto.set()
@@ -0,0 +1,105 @@
+import threading
+from time import monotonic
+
+
+class _Chamada:
+    """Uma execução em andamento, compartilhada por todos que pedirem a mesma chave."""
+
+    def __init__(self, prazo):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        # Maior prazo entre todos que aguardam a chamada (None = sem limite)
+        self.prazo = prazo
+
+
+def _copiar_erro(erro):
+    """
+    Cópia da exceção para um dos chamadores. Relançar o mesmo objeto em várias
+    threads acumularia no `__traceback__` compartilhado os frames de todas.
+    Não chama o __init__, cuja assinatura pode não bater com `args`.
+    """
+    copia = type(erro).__new__(type(erro), *erro.args)
+    copia.__dict__.update(erro.__dict__)
+    return copia
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    A primeira requisição de uma chave executa a função; as que chegarem
+    enquanto ela ainda está em andamento esperam e recebem o mesmo resultado
+    (ou uma cópia da mesma exceção). Quando a execução termina a chave é
+    liberada, então requisições posteriores disparam uma nova chamada.
+
+    A execução roda numa thread própria e cada requisição (inclusive a que a
+    disparou) espera só até o próprio prazo (instante de time.monotonic()),
+    desistindo com TimeoutError. A chamada compartilhada enxerga sempre o
+    maior prazo entre os interessados.
+    """
+
+    def __init__(self, ao_consultar=None):
+        # Callback opcional chamado com True quando a chamada é reaproveitada (hit) e False caso contrário
+        self.ao_consultar = ao_consultar
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self.execucoes = 0
+        self.chamadas_economizadas = 0
+
+    def _prazo_atual(self, chamada):
+        with self._lock:
+            return chamada.prazo
+
+    def executar(self, chave, funcao, prazo=None):
+        """
+        Executa funcao(prazo_atual) uma única vez por chave em andamento.
+        `prazo_atual()` retorna o maior prazo entre todos que aguardam a chamada.
+        """
+        with self._lock:
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada(prazo)
+                self._em_andamento[chave] = chamada
+                self.execucoes += 1
+            else:
+                self.chamadas_economizadas += 1
+                if prazo is None or chamada.prazo is None:
+                    chamada.prazo = None
+                else:
+                    chamada.prazo = max(chamada.prazo, prazo)
+
+        if self.ao_consultar is not None:
+            self.ao_consultar(not lider)
+
+        if lider:
+            threading.Thread(
+                target=self._executar_chamada, args=(chave, chamada, funcao), daemon=True
+            ).start()
+
+        espera = None if prazo is None else max(0, prazo - monotonic())
+        if not chamada.evento.wait(espera):
+            raise TimeoutError("prazo expirado aguardando a chamada compartilhada")
+        if chamada.erro is not None:
+            raise _copiar_erro(chamada.erro) from chamada.erro
+        return chamada.resultado
+
+    def _executar_chamada(self, chave, chamada, funcao):
+        try:
+            chamada.resultado = funcao(lambda: self._prazo_atual(chamada))
+        except Exception as e:
+            chamada.erro = e
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+            chamada.evento.set()
+
+    def metricas(self):
+        """Retorna os contadores de execuções reais e chamadas economizadas."""
+        with self._lock:
+            return {
+                "execucoes": self.execucoes,
+                "chamadas_economizadas": self.chamadas_economizadas,
+                "em_andamento": len(self._em_andamento),
+            }
@@ -2,28 +2,53 @@ import json
 import requests
 import google.generativeai as genai
 import os
+import sys
 from dotenv import load_dotenv
+try:
+    # No container o reclamacao.py é copiado para junto deste arquivo (no docker-compose vem pelo PYTHONPATH)
+    from reclamacao import Reclamacao
+except ImportError:
+    # Fora do Docker ele fica na pasta summarizer/ da raiz do repositório. Um
+    # server/reclamacao.py vazio (deixado por uma montagem antiga do
+    # docker-compose) dá ImportError e precisa sair de sys.modules
+    sys.modules.pop("reclamacao", None)
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "summarizer"))
+    from reclamacao import Reclamacao
 import random
 from time import sleep
+import metrics
+
+# Endereço do Ollama dentro do docker-compose
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://ollama_sum:11434")
+
+# Modelos usados por cada backend (também compõem a chave do single-flight)
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:instruct")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+# Por quanto tempo o Ollama mantém o modelo carregado na memória após cada uso
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Tempo máximo de espera pela resposta do LLM quando nenhum prazo é informado
+LLM_TIMEOUT = 300
 
 class Summarizer:
-    def __init__(self, data: dict):
-        self.id = data.get("id_reclamacao")
+    def __init__(self, data):
+        # Aceita o dict do iterations.json ou um registro Reclamacao já construído
+        self.registro = data if isinstance(data, Reclamacao) else Reclamacao.from_dict(data)
+        self.id = self.registro.id
         
         # texto principal anonimizado
-        self.reclamacao = data.get("reclamacao_anonimizada")
-        
-        # interações anonimizadas
-        self.interacoes = [
-            str(i.get("mensagem_anonimizada"))  # Converte o valor para string
-            for i in data.get("interacoes", [])
-            if i.get("mensagem_anonimizada") is not None    ]
-
-        self.interacoes_autor = [
-            f'{i.get("autor")}: {str(i.get("mensagem_anonimizada"))}'
-            for i in data.get("interacoes", [])
-            if i.get("mensagem_anonimizada") is not None
-        ]
+        self.reclamacao = self.registro.reclamacao
+
+    @property
+    def interacoes(self):
+        """Mensagens das interações anonimizadas"""
+        return self.registro.interacoes
+
+    @property
+    def interacoes_autor(self):
+        """Mensagens das interações anonimizadas no formato 'autor: mensagem'"""
+        return self.registro.interacoes_autor
 
     def get_reclamacao(self):
         """Retorna somente o texto da reclamação anonimizada"""
@@ -37,38 +62,42 @@ class Summarizer:
         """Retorna a lista de mensagens das interações anonimizadas com o autor"""
         return self.interacoes_autor
     
-    def sum_by_llm_ollama(self):
-        """Retorna o resumo gerado pelo LLM"""
-        ollama_host = "http://ollama_sum:11434"  # definido dentro da função
-
-        prompt_text = self.reclamacao + "\n\n" + "\n".join(self.interacoes_autor)
+    def sum_by_llm_ollama(self, timeout=LLM_TIMEOUT):
+        """Retorna o resumo gerado pelo LLM, esperando no máximo `timeout` segundos; falhas geram exceção"""
+        with metrics.span("prompt_build", "ollama"):
+            prompt_text = self.registro.prompt_texto
         payload = {
-            "model": "lhama3:instruct", # llama3:instruct
+            "model": OLLAMA_MODEL,
             "system": """
                          Resuma a reclamação e as interações de forma clara e objetiva em um texto narrativo de até 300 caracteres.
                          Seguindo o seguinte formato:
                          Reclamação: <Resumo>
                       """,
             "prompt": prompt_text,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
             "stream": False
         }
 
         try:
-            response = requests.post(f"{ollama_host}/v1/generate", json=payload)
-            response.raise_for_status()
-            data = response.json()
+            with metrics.span("llm_call", "ollama"):
+                response = requests.post(f"{OLLAMA_HOST}/api/generate", json=payload, timeout=timeout)
+                response.raise_for_status()
+                data = response.json()
+            metrics.registrar_resposta_ollama(OLLAMA_MODEL, data)
             return data.get("response", "")
         except Exception as e:
-            return f"Error: {str(e)}"
+            # Timeout, conexão e HTTP sobem para a API responder com o status adequado
+            metrics.ERRORS.labels(backend="ollama", kind=type(e).__name__).inc()
+            raise
     
-    def sum_by_llm_gemini(self):
+    def sum_by_llm_gemini(self, timeout=LLM_TIMEOUT):
         
         # Substitua "SUA_CHAVE_DE_API_AQUI" pela sua chave real
         # genai.configure(api_key="SUA_CHAVE_DE_API_AQUI") 
         load_dotenv()
         genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = genai.GenerativeModel(GEMINI_MODEL)
 
         prompt_with_instructions = """
         Resuma a reclamação e as interações de forma clara e objetiva em um texto narrativo de até 300 caracteres.
@@ -79,9 +108,18 @@ class Summarizer:
         --- Reclamação e Interações ---
         """
 
-        prompt_with_instructions += self.reclamacao + "\n\n" + "\n".join(self.interacoes_autor)
+        with metrics.span("prompt_build", "gemini"):
+            prompt_with_instructions += self.registro.prompt_texto
         
-        response = model.generate_content(prompt_with_instructions)
+        try:
+            with metrics.span("llm_call", "gemini"):
+                response = model.generate_content(
+                    prompt_with_instructions, request_options={"timeout": timeout}
+                )
+        except Exception as e:
+            metrics.ERRORS.labels(backend="gemini", kind=type(e).__name__).inc()
+            raise
+        metrics.registrar_resposta_gemini(GEMINI_MODEL, response)
 
         # RETORNA o texto da resposta
         return response.text
@@ -98,7 +136,11 @@ if __name__ == "__main__":
         print(f"Processando reclamação {i+1}/50...")
         
         summarizer = Summarizer(instance)  # passa o objeto inteiro
-        resumo = summarizer.sum_by_llm_ollama()
+        try:
+            resumo = summarizer.sum_by_llm_ollama()
+        except Exception as e:
+            # Uma falha não interrompe o lote: o erro fica registrado no resultado
+            resumo = f"Error: {str(e)}"
 
         # sleep(10)  # para evitar limite de taxa
         reclamacao = instance.get("reclamacao_anonimizada", "")
@@ -0,0 +1,97 @@
+import gc
+import json
+import random
+import tracemalloc
+from time import perf_counter
+
+from reclamacao import Reclamacao
+
+N_REGISTROS = 10**5
+# Quantas vezes o prompt é pedido por registro (ex.: uma chamada por backend)
+USOS_DO_PROMPT = 3
+
+
+class RegistroLegado:
+    """Representação anterior do Summarizer: dict original + duas listas de interações."""
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.id = data.get("id_reclamacao")
+        self.reclamacao = data.get("reclamacao_anonimizada")
+        self.interacoes = [
+            str(i.get("mensagem_anonimizada"))
+            for i in data.get("interacoes", [])
+            if i.get("mensagem_anonimizada") is not None
+        ]
+        self.interacoes_autor = [
+            f'{i.get("autor")}: {str(i.get("mensagem_anonimizada"))}'
+            for i in data.get("interacoes", [])
+            if i.get("mensagem_anonimizada") is not None
+        ]
+
+    def prompt_texto(self):
+        return self.reclamacao + "\n\n" + "\n".join(self.interacoes_autor)
+
+
+def gerar_dados(n):
+    """Gera n reclamações no formato do iterations.json a partir dos textos salvos."""
+    with open("10_reclamacoes_resumidas_lc_ollama.json", "r", encoding="utf-8") as f:
+        textos = [r["reclamação_original"] for r in json.load(f)]
+
+    rng = random.Random(42)
+    return [
+        {
+            "id_reclamacao": str(i),
+            "reclamacao_anonimizada": rng.choice(textos),
+            "interacoes": [
+                {
+                    "autor": rng.choice(["Consumidor", "Empresa"]),
+                    "mensagem_anonimizada": rng.choice(textos)[:rng.randint(80, 400)],
+                }
+                for _ in range(rng.randint(0, 6))
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def usar(registros, prompt):
+    for r in registros:
+        for _ in range(USOS_DO_PROMPT):
+            prompt(r)
+
+
+def medir(nome, construir, prompt, data_list):
+    # Tempos numa passada sem tracemalloc, que distorce a medição
+    gc.collect()
+    inicio = perf_counter()
+    registros = [construir(d) for d in data_list]
+    tempo_construcao = perf_counter() - inicio
+    inicio = perf_counter()
+    usar(registros, prompt)
+    tempo_prompt = perf_counter() - inicio
+    del registros
+
+    # Memória retida depois que os prompts já foram montados (inclui o que ficar em cache)
+    gc.collect()
+    tracemalloc.start()
+    registros = [construir(d) for d in data_list]
+    usar(registros, prompt)
+    memoria, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registros
+
+    print(
+        f"{nome:<12} memória: {memoria / 2**20:8.1f} MiB (pico {pico / 2**20:8.1f} MiB) | "
+        f"construção: {len(data_list) / tempo_construcao:10,.0f} registros/s | "
+        f"prompt x{USOS_DO_PROMPT}: {len(data_list) / tempo_prompt:10,.0f} registros/s | "
+        f"total: {(tempo_construcao + tempo_prompt) / len(data_list) * 1e6:5.2f} µs/registro"
+    )
+
+
+if __name__ == "__main__":
+    data_list = gerar_dados(N_REGISTROS)
+    print(f"{N_REGISTROS:,} registros")
+
+    medir("legado", RegistroLegado, RegistroLegado.prompt_texto, data_list)
+    medir("Reclamacao", Reclamacao.from_dict, lambda r: r.prompt_texto, data_list)
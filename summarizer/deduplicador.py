@@ -0,0 +1,189 @@
+import hashlib
+import re
+
+import numpy as np
+
+from reclamacao import Reclamacao
+
+
+def _normalizar(texto):
+    """Minúsculas e espaços colapsados, para que diferenças de formatação não contem."""
+    return re.sub(r"\s+", " ", (texto or "").lower()).strip()
+
+
+def _hash64(valor):
+    return int.from_bytes(hashlib.blake2b(valor.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _escolher_bandas(num_permutacoes, limiar):
+    """
+    Escolhe (bandas, linhas) com bandas * linhas = num_permutacoes de forma
+    que o ponto de corte do LSH, (1 / bandas) ** (1 / linhas), fique no
+    limiar ou abaixo dele, o mais perto possível. Um corte acima do limiar
+    deixaria de propor boa parte dos pares que o atingem; abaixo, o custo é
+    só verificar mais candidatos, já que todo par é conferido depois.
+    """
+    opcoes = [
+        (b, num_permutacoes // b)
+        for b in range(1, num_permutacoes + 1)
+        if num_permutacoes % b == 0
+    ]
+
+    def corte(br):
+        return (1 / br[0]) ** (1 / br[1])
+
+    abaixo = [br for br in opcoes if corte(br) <= limiar]
+    # Só fica vazio para limiares menores que 1 / num_permutacoes
+    return max(abaixo, key=corte) if abaixo else min(opcoes, key=corte)
+
+
+class Deduplicador:
+    """
+    Agrupa reclamações quase idênticas usando MinHash + LSH sobre shingles de palavras.
+
+    Cada texto vira o conjunto de sequências de `tamanho_shingle` palavras; a
+    assinatura MinHash estima a similaridade de Jaccard entre dois conjuntos e
+    o LSH (assinatura dividida em bandas) encontra os pares candidatos sem
+    comparar todos contra todos. Os candidatos são conferidos pela
+    similaridade de Jaccard exata dos shingles, e só pares que atingem o
+    `limiar` ficam no mesmo grupo.
+    """
+
+    def __init__(self, limiar=0.8, num_permutacoes=128, tamanho_shingle=3, seed=42):
+        self.limiar = limiar
+        self.num_permutacoes = num_permutacoes
+        self.tamanho_shingle = tamanho_shingle
+        self.bandas, self.linhas = _escolher_bandas(num_permutacoes, limiar)
+
+        # Permutações por hashing multiplicar-somar-deslocar: (a * h + b) mod 2^64,
+        # ficando com os 32 bits mais altos; `a` ímpar. Em uint64 o numpy
+        # calcula todas as permutações de uma vez e o módulo sai de graça.
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2**64, size=num_permutacoes, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 2**64, size=num_permutacoes, dtype=np.uint64, endpoint=False)
+
+    def shingles(self, texto):
+        """Conjunto de shingles do texto; vazio se o texto for vazio ou só espaços."""
+        normalizado = _normalizar(texto)
+        if not normalizado:
+            return set()
+        palavras = normalizado.split(" ")
+        if len(palavras) <= self.tamanho_shingle:
+            return {" ".join(palavras)}
+        return {
+            " ".join(palavras[i:i + self.tamanho_shingle])
+            for i in range(len(palavras) - self.tamanho_shingle + 1)
+        }
+
+    def hashes(self, texto):
+        """Conjunto dos hashes de 64 bits dos shingles do texto."""
+        return frozenset(_hash64(s) for s in self.shingles(texto))
+
+    def assinatura(self, hashes):
+        """Assinatura MinHash de um conjunto não vazio de hashes (vetor numpy com num_permutacoes inteiros)."""
+        h = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        # Matriz shingles x permutações; o mínimo de cada coluna é uma posição da assinatura
+        return ((h[:, None] * self._a + self._b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similaridade(hashes_a, hashes_b):
+        """Similaridade de Jaccard exata entre dois conjuntos de hashes de shingles."""
+        # Texto vazio não é indício de duplicata: não se parece com nenhum outro
+        if not hashes_a or not hashes_b:
+            return 0.0
+        return len(hashes_a & hashes_b) / len(hashes_a | hashes_b)
+
+    def agrupar(self, textos):
+        """
+        Retorna a lista de grupos (listas de índices em `textos`). O primeiro
+        índice de cada grupo é o representante, e todo membro tem similaridade
+        ao representante de pelo menos `limiar`; grupos com um único elemento
+        são textos sem duplicata. Textos vazios ficam sempre sozinhos.
+        """
+        conjuntos = [self.hashes(t) for t in textos]
+        assinaturas = [self.assinatura(h) if h else None for h in conjuntos]
+
+        def chave(i, banda):
+            inicio = banda * self.linhas
+            return assinaturas[i][inicio:inicio + self.linhas].tobytes()
+
+        baldes = [{} for _ in range(self.bandas)]
+        for i in range(len(textos)):
+            if assinaturas[i] is None:
+                continue
+            for banda in range(self.bandas):
+                baldes[banda].setdefault(chave(i, banda), []).append(i)
+
+        # Agrupa em torno de um centro: o primeiro texto ainda sem grupo vira
+        # representante e só entram candidatos similares a ele. Não há
+        # encadeamento (A~B e B~C não põem A e C juntos).
+        grupo_de = [None] * len(textos)
+        grupos = []
+        for centro in range(len(textos)):
+            if grupo_de[centro] is not None:
+                continue
+            grupo_de[centro] = len(grupos)
+            grupo = [centro]
+            if assinaturas[centro] is None:
+                grupos.append(grupo)
+                continue
+            vistos = {centro}
+            for banda in range(self.bandas):
+                for outro in baldes[banda][chave(centro, banda)]:
+                    if outro in vistos or grupo_de[outro] is not None:
+                        continue
+                    vistos.add(outro)
+                    if self.similaridade(conjuntos[centro], conjuntos[outro]) >= self.limiar:
+                        grupo_de[outro] = len(grupos)
+                        grupo.append(outro)
+            grupos.append(sorted(grupo))
+        return grupos
+
+
+def _texto_para_agrupar(data):
+    """
+    Reclamação seguida das interações, o mesmo texto que vai ao LLM: um resumo
+    só é dividido entre reclamações cujas interações (e a solução dada) também
+    coincidem. Sem texto de reclamação retorna "", que nunca forma grupo.
+    """
+    if not _normalizar(data.get("reclamacao_anonimizada")):
+        return ""
+    return Reclamacao.from_dict(data).prompt_texto
+
+
+def resumir_deduplicado(data_list, resumir, limiar=0.8, reutilizar_resumo=True):
+    """
+    Resume uma lista de reclamações chamando o LLM só uma vez por grupo de
+    quase-duplicatas. A comparação usa `reclamacao_anonimizada` junto com as
+    interações; reclamações sem texto são sempre resumidas individualmente.
+
+    `resumir` recebe a instância (dict) e retorna o resumo. Com
+    `reutilizar_resumo=True` as demais reclamações do grupo, todas com
+    similaridade ao representante de pelo menos `limiar`, recebem o resumo
+    dele; caso contrário ficam com resumo None e apenas a
+    indicação de qual reclamação as representa.
+
+    Retorna (resumos, relatorio), onde resumos[i] é um dict com "resumo" e
+    "representante" (índice em data_list) para cada reclamação.
+    """
+    deduplicador = Deduplicador(limiar=limiar)
+    grupos = deduplicador.agrupar([_texto_para_agrupar(d) for d in data_list])
+
+    resumos = [None] * len(data_list)
+    for grupo in grupos:
+        representante = grupo[0]
+        resumo = resumir(data_list[representante])
+        for i in grupo:
+            resumos[i] = {
+                "resumo": resumo if (i == representante or reutilizar_resumo) else None,
+                "representante": representante,
+            }
+
+    relatorio = {
+        "reclamacoes": len(data_list),
+        "grupos": len(grupos),
+        "grupos_com_duplicatas": sum(1 for g in grupos if len(g) > 1),
+        "chamadas_llm": len(grupos),
+        "chamadas_evitadas": len(data_list) - len(grupos),
+    }
+    return resumos, relatorio
@@ -3,6 +3,7 @@ import requests
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from reclamacao import Reclamacao
 from time import sleep
 
 # --- LangChain/Pydantic Imports ---
@@ -44,18 +45,18 @@ summarize_chain = ollama_prompt | structured_llm
 
 
 class Summarizer:
-    def __init__(self, data: dict):
-        self.id = data.get("id_reclamacao")
+    def __init__(self, data):
+        # Aceita o dict do iterations.json ou um registro Reclamacao já construído
+        self.registro = data if isinstance(data, Reclamacao) else Reclamacao.from_dict(data)
+        self.id = self.registro.id
         
         # texto principal anonimizado
-        self.reclamacao = data.get("reclamacao_anonimizada")
-        
-        # interações formatadas para o prompt (Autor: Mensagem)
-        self.interacoes_autor = [
-            f'{i.get("autor")}: {str(i.get("mensagem_anonimizada"))}'
-            for i in data.get("interacoes", [])
-            if i.get("mensagem_anonimizada") is not None
-        ]
+        self.reclamacao = self.registro.reclamacao
+
+    @property
+    def interacoes_autor(self):
+        """Mensagens das interações anonimizadas no formato 'autor: mensagem'"""
+        return self.registro.interacoes_autor
 
     def sum_by_llm_ollama(self):
         """Retorna o resumo gerado pelo LLM Ollama usando a rota /api/generate com formato JSON."""
@@ -72,7 +73,7 @@ class Summarizer:
             {self.reclamacao}
 
             Interações:
-            {"\n".join(self.interacoes_autor)}
+            {self.registro.interacoes_autor_texto}
         """
         
         ollama_host = "http://localhost:11434"
@@ -125,7 +126,7 @@ class Summarizer:
             # O .invoke() injeta os dados na chain configurada (que usa o LLM global)
             resumo_pydantic = summarize_chain.invoke({
                 "reclamacao": self.reclamacao,
-                "interacoes_autor": "\n".join(self.interacoes_autor)
+                "interacoes_autor": self.registro.interacoes_autor_texto
             })
             
             # Converte o objeto Pydantic validado para um dicionário Python simples
@@ -152,7 +153,7 @@ class Summarizer:
         user_content = f"""
         Reclamação: {self.reclamacao}
         
-        Interações: {"\n".join(self.interacoes_autor)}
+        Interações: {self.registro.interacoes_autor_texto}
         """
         
         # O Gemini usa response_mime_type para forçar a saída JSON
@@ -3,11 +3,12 @@ import requests
 ollama_host = "http://localhost:11434"
 
 try:
-    response = requests.get(f"{ollama_host}/api/models")
+    # /api/tags lista os modelos baixados localmente no Ollama
+    response = requests.get(f"{ollama_host}/api/tags", timeout=10)
     response.raise_for_status()
     data = response.json()
     print("Modelos disponíveis no Ollama:")
-    for model in data:
+    for model in data.get("models", []):
         print("-", model.get("name", model))
 except Exception as e:
     print(f"Erro ao listar modelos: {e}")
@@ -3,8 +3,10 @@ import requests
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from reclamacao import Reclamacao
 import random
 from time import sleep
+from deduplicador import resumir_deduplicado
 
 # --- LangChain/Pydantic Imports ---
 from pydantic import BaseModel, Field
@@ -64,23 +66,23 @@ class ResumoReclamacao(BaseModel):
     Solução: str = Field(description="A resolução proposta ou o resultado final da interação, se houver.")
 
 class Summarizer:
-    def __init__(self, data: dict):
-        self.id = data.get("id_reclamacao")
+    def __init__(self, data):
+        # Aceita o dict do iterations.json ou um registro Reclamacao já construído
+        self.registro = data if isinstance(data, Reclamacao) else Reclamacao.from_dict(data)
+        self.id = self.registro.id
         
         # texto principal anonimizado
-        self.reclamacao = data.get("reclamacao_anonimizada")
-        
-        # interações anonimizadas
-        self.interacoes = [
-            str(i.get("mensagem_anonimizada"))  # Converte o valor para string
-            for i in data.get("interacoes", [])
-            if i.get("mensagem_anonimizada") is not None    ]
-
-        self.interacoes_autor = [
-            f'{i.get("autor")}: {str(i.get("mensagem_anonimizada"))}'
-            for i in data.get("interacoes", [])
-            if i.get("mensagem_anonimizada") is not None
-        ]
+        self.reclamacao = self.registro.reclamacao
+
+    @property
+    def interacoes(self):
+        """Mensagens das interações anonimizadas"""
+        return self.registro.interacoes
+
+    @property
+    def interacoes_autor(self):
+        """Mensagens das interações anonimizadas no formato 'autor: mensagem'"""
+        return self.registro.interacoes_autor
 
     def sum_by_llm_ollama(self):
         """Retorna o resumo gerado pelo LLM Ollama em formato JSON com texto descritivo."""
@@ -102,7 +104,7 @@ class Summarizer:
             {self.reclamacao}
 
             Interações:
-            {"\n".join(self.interacoes_autor)}
+            {self.registro.interacoes_autor_texto}
         """
         
         ollama_host = "http://localhost:11434"
@@ -177,7 +179,7 @@ class Summarizer:
         --- Reclamação e Interações ---
         """
 
-        prompt_with_instructions += self.reclamacao + "\n\n" + "\n".join(self.interacoes_autor)
+        prompt_with_instructions += self.registro.prompt_texto
         
         try:
             response = model.generate_content(prompt_with_instructions)
@@ -219,7 +221,7 @@ class Summarizer:
             {self.reclamacao}
 
             --- Interações ---
-            {"\n".join(self.interacoes_autor)}
+            {self.registro.interacoes_autor_texto}
         """
 
         # 3. Payload para /api/chat
@@ -279,7 +281,7 @@ class Summarizer:
             # O .invoke() injeta os dados na chain configurada
             resumo_pydantic = summarize_chain.invoke({
                 "reclamacao": self.reclamacao,
-                "interacoes_autor": "\n".join(self.interacoes_autor)
+                "interacoes_autor": self.registro.interacoes_autor_texto
             })
             
             # Converte o objeto Pydantic validado para um dicionário Python simples
@@ -297,25 +299,48 @@ class Summarizer:
 if __name__ == "__main__":
     # Abrir o arquivo original
     with open("iterations.json", "r", encoding="utf-8") as f:
-        data_list = json.load(f)
+        data_list = json.load(f)[:10]
 
-    # Lista para armazenar as novas instâncias
-    result = []
+    # Reclamações quase idênticas (similaridade >= LIMIAR_SIMILARIDADE no texto
+    # e nas interações) são resumidas uma única vez; com REUTILIZAR_RESUMO as
+    # demais do grupo recebem o mesmo resumo
+    LIMIAR_SIMILARIDADE = 0.8
+    REUTILIZAR_RESUMO = True
 
-    for i, instance in enumerate(data_list[:10]):
-        print(f"Processando reclamação {i+1}/10...")
-        
-        summarizer = Summarizer(instance)  # passa o objeto inteiro
-        resumo = summarizer.sum_by_llm_ollama_langchain()
+    chamadas = 0
+
+    def resumir(instance):
+        global chamadas
+        chamadas += 1
+        print(f"Processando reclamação {chamadas} (ID: {instance.get('id_reclamacao', 'N/A')})...")
 
+        summarizer = Summarizer(instance)  # passa o objeto inteiro
         # sleep(10)  # para evitar limite de taxa
+        return summarizer.sum_by_llm_ollama_langchain()
+
+    resumos, relatorio = resumir_deduplicado(
+        data_list, resumir, limiar=LIMIAR_SIMILARIDADE, reutilizar_resumo=REUTILIZAR_RESUMO
+    )
+
+    # Lista para armazenar as novas instâncias
+    result = []
+
+    for i, (instance, resumo) in enumerate(zip(data_list, resumos)):
         reclamacao = instance.get("reclamacao_anonimizada", "")
+        representante = resumo["representante"]
 
         result.append({
             "reclamação": reclamacao,
-            "resposta": resumo
+            "resposta": resumo["resumo"],
+            # ID da reclamação cujo resumo foi reaproveitado (None se foi resumida)
+            "duplicata_de": data_list[representante].get("id_reclamacao") if representante != i else None
         })
 
-        # Salvar em um novo arquivo JSON
-        with open("10_reclamacoes_resumidas_lhama3.json", "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    # Salvar em um novo arquivo JSON
+    with open("10_reclamacoes_resumidas_lhama3.json", "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"{relatorio['reclamacoes']} reclamações em {relatorio['grupos']} grupos: "
+        f"{relatorio['chamadas_llm']} chamadas ao LLM, {relatorio['chamadas_evitadas']} evitadas."
+    )
@@ -0,0 +1,58 @@
+import sys
+
+
+class Reclamacao:
+    """
+    Registro compacto de uma reclamação, compartilhado pelo summarizer e pelo
+    servidor do cluster.
+
+    Guarda apenas o que os prompts usam: id, texto anonimizado e as
+    interações em duas tuplas paralelas (autores e mensagens), sem manter o
+    dict original. Os nomes de autor se repetem muito e são internados. O
+    prompt é montado só na primeira vez que for pedido e depois
+    reaproveitado; o texto das interações sozinho não é guardado, para não
+    manter as mensagens uma terceira vez na memória.
+    """
+
+    __slots__ = ("id", "reclamacao", "autores", "mensagens", "_prompt_texto")
+
+    def __init__(self, id, reclamacao, autores=(), mensagens=()):
+        self.id = id
+        self.reclamacao = reclamacao
+        self.autores = tuple(autores)
+        self.mensagens = tuple(mensagens)
+        self._prompt_texto = None
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Cria o registro a partir de um item do iterations.json, percorrendo as interações uma única vez."""
+        autores, mensagens = [], []
+        for i in data.get("interacoes", []):
+            mensagem = i.get("mensagem_anonimizada")
+            if mensagem is not None:
+                autores.append(sys.intern(str(i.get("autor"))))
+                mensagens.append(str(mensagem))
+
+        return cls(data.get("id_reclamacao"), data.get("reclamacao_anonimizada"), autores, mensagens)
+
+    @property
+    def interacoes(self):
+        """Lista das mensagens das interações anonimizadas"""
+        return list(self.mensagens)
+
+    @property
+    def interacoes_autor(self):
+        """Lista das mensagens das interações no formato 'autor: mensagem'"""
+        return [f"{autor}: {mensagem}" for autor, mensagem in zip(self.autores, self.mensagens)]
+
+    @property
+    def interacoes_autor_texto(self):
+        """Interações no formato 'autor: mensagem', uma por linha"""
+        return "\n".join(self.interacoes_autor)
+
+    @property
+    def prompt_texto(self):
+        """Reclamação seguida das interações, separadas por uma linha em branco (montado uma vez)"""
+        if self._prompt_texto is None:
+            self._prompt_texto = self.reclamacao + "\n\n" + self.interacoes_autor_texto
+        return self._prompt_texto